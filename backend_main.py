@@ -2,14 +2,17 @@
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from pydantic.functional_validators import field_validator
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from contextlib import asynccontextmanager
-import uvicorn
+import aiofiles
+import asyncio
+import orjson
 from datetime import datetime
-import json
+import random
+import time
 import logging
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 import sys
 import os
@@ -22,16 +25,22 @@ for directory in ["logs", "data"]:
     Path(directory).mkdir(parents=True, exist_ok=True)
 
 # Professional logging configuration
+# Production runs at WARNING to keep formatting + handler I/O off the hot
+# path; the rotating handler caps log disk usage at ~50 MB
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.WARNING if os.getenv('ENV') == 'production' else logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
     handlers=[
-        logging.FileHandler('logs/triage.log', encoding='utf-8'),
+        RotatingFileHandler('logs/triage.log', maxBytes=10 * 1024 * 1024,
+                            backupCount=5, encoding='utf-8'),
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Fraction of per-request INFO lines actually emitted on hot endpoints
+LOG_SAMPLE_RATE = 0.1
+
 # Initialize services with error handling
 try:
     triage_engine = TriageEngine()
@@ -42,27 +51,22 @@ except Exception as e:
     raise
 
 # Pydantic models with validation
+# str_strip_whitespace runs in pydantic-core's Rust fast path, so the
+# strip + emptiness checks no longer need Python field validators:
+# whitespace-only input is stripped first and then fails min_length
 class TriageRequest(BaseModel):
     """Request model for triage analysis with comprehensive validation"""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+
     symptoms: str = Field(..., min_length=5, max_length=1000, description="Patient symptoms description")
     age: Optional[int] = Field(None, ge=0, le=120, description="Patient age in years")
     allergies: Optional[str] = Field(None, max_length=500, description="Known allergies")
-    
-    @field_validator('symptoms')
-    def symptoms_must_not_be_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError('Symptoms cannot be empty')
-        return v.strip()
 
 class ChatRequest(BaseModel):
     """Request model for chat interactions"""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
+
     message: str = Field(..., min_length=1, max_length=500, description="User message")
-    
-    @field_validator('message')
-    def message_must_not_be_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError('Message cannot be empty')
-        return v.strip()
 
 class TriageResponse(BaseModel):
     """Response model for triage analysis results"""
@@ -72,39 +76,60 @@ class TriageResponse(BaseModel):
     detected_symptoms: List[str]
     timestamp: str
 
-# Storage for history - production-ready implementation
-HISTORY_FILE = Path("data/triage_history.json")
+def utc_timestamp() -> str:
+    """Single cheap UTC timestamp used for user-visible times"""
+    return datetime.utcnow().isoformat(timespec='milliseconds') + 'Z'
 
-def load_history() -> List[Dict[str, Any]]:
-    """Load triage history from file with error handling"""
-    try:
-        if HISTORY_FILE.exists():
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse history file: {e}")
-    except Exception as e:
-        logger.error(f"Failed to load history: {e}")
-    return []
+# Storage for history - append-only JSONL so the request path never
+# rewrites (or even reads) the full history
+HISTORY_FILE = Path("data/triage_history.jsonl")
+_TAIL_CHUNK = 64 * 1024  # bytes read from the end when serving /history
+
+# Strong references to in-flight history appends: the loop only keeps a
+# weak reference to tasks, so a bare create_task() can be garbage-
+# collected before it runs and the record silently dropped
+_history_tasks: set = set()
+
+
+def schedule_history_append(entry: Dict[str, Any]) -> None:
+    """Fire-and-forget a history append, keeping the task alive"""
+    task = asyncio.create_task(append_history(entry))
+    _history_tasks.add(task)
+    task.add_done_callback(_history_tasks.discard)
 
-def save_history(history: List[Dict[str, Any]]) -> bool:
-    """Save triage history to file with error handling"""
+
+async def append_history(entry: Dict[str, Any]) -> None:
+    """Append one history record without blocking the event loop"""
     try:
         HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
-        return True
+        async with aiofiles.open(HISTORY_FILE, 'ab') as f:
+            await f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
     except Exception as e:
-        logger.error(f"Failed to save history: {e}")
-        return False
+        logger.error(f"Failed to append history: {e}")
 
-def anonymize_data(data: Dict[str, Any]) -> Dict[str, Any]:
-    """GDPR-compliant data anonymization"""
-    anonymized = data.copy()
-    # Remove or hash any identifying information
-    if 'allergies' in anonymized:
-        anonymized['allergies'] = 'REDACTED' if anonymized['allergies'] else None
-    return anonymized
+def read_history_tail(limit: int = 50) -> tuple[List[Dict[str, Any]], int]:
+    """Read the last `limit` history records plus the total record count"""
+    try:
+        if not HISTORY_FILE.exists():
+            return [], 0
+        total = 0
+        with open(HISTORY_FILE, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                total += chunk.count(b'\n')
+            f.seek(max(0, f.tell() - _TAIL_CHUNK))
+            lines = f.read().splitlines()
+        if total > len(lines):
+            lines = lines[1:]  # first line may be a partial record
+        entries = []
+        for line in lines[-limit:]:
+            try:
+                entries.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue
+        return entries, total
+    except Exception as e:
+        logger.error(f"Failed to load history: {e}")
+        return [], 0
 
 # Application Lifecycle Events
 from contextlib import asynccontextmanager
@@ -138,6 +163,7 @@ async def lifespan(app: FastAPI):
         logger.error("✗ Service initialization incomplete")
     
     # Log configuration
+    logger.info(f"✓ Ollama concurrency: OLLAMA_NUM_PARALLEL={os.getenv('OLLAMA_NUM_PARALLEL', 'auto')} | OLLAMA_MAX_LOADED_MODELS={os.getenv('OLLAMA_MAX_LOADED_MODELS', 'auto')}")
     logger.info(f"✓ CORS configured for: http://localhost:3000")
     logger.info(f"✓ API documentation: http://localhost:8000/docs")
     logger.info(f"✓ History file: {HISTORY_FILE}")
@@ -163,6 +189,10 @@ async def lifespan(app: FastAPI):
         # Ensure metrics are persisted
         monitoring._save_metrics()
         logger.info("✓ Metrics saved successfully")
+
+        # Release pooled connections (only services that were built)
+        await triage_engine.aclose()
+        logger.info("✓ Service connections closed")
     except Exception as e:
         logger.error(f"✗ Error during shutdown: {e}")
     
@@ -220,13 +250,18 @@ async def triage_symptoms(request: TriageRequest) -> TriageResponse:
     
     Returns urgency level, confidence score, medical advice, and detected symptoms
     """
-    start_time = datetime.now()
-    
+    # perf_counter_ns for latency deltas: datetime.now() resolves the
+    # local timezone on every call and is far heavier
+    start_ns = time.perf_counter_ns()
+
+    sampled = random.random() < LOG_SAMPLE_RATE
+
     try:
-        logger.info(f"Processing triage request - symptoms length: {len(request.symptoms)}")
+        if sampled:
+            logger.info("Processing triage request - symptoms length: %d", len(request.symptoms))
         
         # Process with triage engine
-        result = triage_engine.analyze(
+        result = await triage_engine.analyze(
             symptoms=request.symptoms,
             age=request.age,
             allergies=request.allergies
@@ -238,22 +273,22 @@ async def triage_symptoms(request: TriageRequest) -> TriageResponse:
             confidence=result['confidence'],
             advice=result['advice'],
             detected_symptoms=result['detected_symptoms'],
-            timestamp=datetime.now().isoformat()
+            timestamp=utc_timestamp()
         )
         
-        # Save to history (anonymized)
-        history = load_history()
+        # Save to history (built anonymized in place - GDPR: allergies are
+        # never persisted in the clear)
         history_entry = {
             "symptoms": request.symptoms,
             "urgency_level": result['urgency_level'],
             "confidence": result['confidence'],
-            "timestamp": response.timestamp
+            "timestamp": response.timestamp,
+            "allergies": "REDACTED" if request.allergies else None
         }
-        history.append(anonymize_data(history_entry))
-        save_history(history)
+        schedule_history_append(history_entry)
         
         # Log monitoring data
-        latency = (datetime.now() - start_time).total_seconds()
+        latency = (time.perf_counter_ns() - start_ns) / 1e9
         monitoring.log_request(
             endpoint="/triage",
             latency=latency,
@@ -261,7 +296,9 @@ async def triage_symptoms(request: TriageRequest) -> TriageResponse:
             urgency_level=result['urgency_level']
         )
         
-        logger.info(f"Triage completed: {result['urgency_level']} (confidence: {result['confidence']:.2f}, latency: {latency:.3f}s)")
+        if sampled:
+            logger.info("Triage completed: %s (confidence: %.2f, latency: %.3fs)",
+                        result['urgency_level'], result['confidence'], latency)
         
         return response
         
@@ -271,7 +308,7 @@ async def triage_symptoms(request: TriageRequest) -> TriageResponse:
         logger.error(f"Triage error: {str(e)}", exc_info=True)
         monitoring.log_request(
             endpoint="/triage",
-            latency=(datetime.now() - start_time).total_seconds(),
+            latency=(time.perf_counter_ns() - start_ns) / 1e9,
             status="error"
         )
         raise HTTPException(
@@ -289,8 +326,9 @@ async def chat(request: ChatRequest) -> Dict[str, str]:
     Returns AI-generated response with medical guidance
     """
     try:
-        logger.info(f"Chat request: {request.message[:50]}...")
-        response = triage_engine.chat(request.message)
+        if random.random() < LOG_SAMPLE_RATE:
+            logger.info("Chat request: %.50s...", request.message)
+        response = await triage_engine.chat(request.message)
         return {"response": response}
     except Exception as e:
         logger.error(f"Chat error: {str(e)}", exc_info=True)
@@ -307,8 +345,8 @@ async def get_history() -> Dict[str, Any]:
     Returns the last 50 triage records (GDPR-compliant, anonymized data)
     """
     try:
-        history = load_history()
-        return {"history": history[-50:], "total": len(history)}
+        history, total = read_history_tail(50)
+        return {"history": history, "total": total}
     except Exception as e:
         logger.error(f"History retrieval error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -325,7 +363,8 @@ async def clear_history() -> Dict[str, str]:
         HTTPException: 500 if history deletion fails
     """
     try:
-        save_history([])
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        HISTORY_FILE.write_text("")
         logger.info("History cleared by user request (GDPR compliance)")
         monitoring.log_request("DELETE /history", 0.0, True)
         return {"message": "History cleared successfully"}
@@ -350,6 +389,14 @@ async def get_metrics() -> Dict[str, Any]:
     """
     try:
         metrics = monitoring.get_metrics()
+        metrics["engine_cache"] = triage_engine.cache_stats()
+        # Read the backing fields, not the lazy properties: a metrics
+        # scrape must report on services already in use, not construct
+        # them as a side effect
+        if triage_engine._ai_service is not None:
+            metrics["ai_cache"] = triage_engine._ai_service.cache_stats()
+        if triage_engine._graph_db is not None:
+            metrics["graph_cache"] = triage_engine._graph_db.cache_stats()
         logger.info("Metrics retrieved successfully")
         return metrics
     except Exception as e:
@@ -373,11 +420,13 @@ async def health_check() -> Dict[str, Any]:
         monitoring_status = "operational" if monitoring else "unavailable"
         
         # Check storage availability
-        storage_status = "operational"
-        try:
-            load_history()
-        except Exception:
-            storage_status = "degraded"
+        # Probe writability only - liveness probes run every few seconds,
+        # so reading history here would be O(history size) per probe
+        storage_status = (
+            "operational"
+            if HISTORY_FILE.parent.is_dir() and os.access(HISTORY_FILE.parent, os.W_OK)
+            else "degraded"
+        )
         
         overall_status = "healthy" if all([
             triage_status == "operational",
@@ -387,7 +436,7 @@ async def health_check() -> Dict[str, Any]:
         
         return {
             "status": overall_status,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": utc_timestamp(),
             "components": {
                 "triage_engine": triage_status,
                 "monitoring": monitoring_status,
@@ -399,7 +448,7 @@ async def health_check() -> Dict[str, Any]:
         logger.error(f"Health check error: {str(e)}", exc_info=True)
         return {
             "status": "unhealthy",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": utc_timestamp(),
             "error": str(e)
         }
 
@@ -422,6 +471,8 @@ if __name__ == "__main__":
     logger.info("=" * 80)
     
     try:
+        import uvicorn
+
         uvicorn.run(
             app, 
             host="0.0.0.0", 
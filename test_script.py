@@ -0,0 +1,120 @@
+"""Smoke-test script for the Medical Triage Assistant API"""
+import asyncio
+import orjson
+import httpx
+
+API_BASE = "http://localhost:8000"
+
+JSON_HEADERS = {"content-type": "application/json"}
+
+TEST_CASES = [
+    {"name": "Emergency - cardiac", "symptoms": "severe chest pain radiating to my left arm with sweating", "age": 58, "allergies": None},
+    {"name": "Emergency - stroke", "symptoms": "sudden slurred speech and confusion with vision changes", "age": 71, "allergies": None},
+    {"name": "Urgent - respiratory", "symptoms": "wheezing and difficulty breathing, cannot speak full sentences", "age": 34, "allergies": "pollen"},
+    {"name": "Moderate - GI", "symptoms": "vomiting and diarrhea since yesterday evening", "age": 26, "allergies": None},
+    {"name": "Low - cold", "symptoms": "runny nose, sore throat and mild cough for two days", "age": 30, "allergies": None},
+    {"name": "Minimal - headache", "symptoms": "mild headache after a long day at work", "age": 24, "allergies": None},
+]
+
+CHAT_MESSAGES = [
+    "What is a fever?",
+    "When should I see a doctor about a cough?",
+    "How can I treat a mild headache at home?",
+]
+
+# Bodies are static: encode each exactly once with orjson (C encoder)
+for tc in TEST_CASES:
+    tc["_body"] = orjson.dumps(
+        {"symptoms": tc["symptoms"], "age": tc["age"], "allergies": tc["allergies"]}
+    )
+CHAT_BODIES = [(msg, orjson.dumps({"message": msg})) for msg in CHAT_MESSAGES]
+
+
+async def test_triage(client, case):
+    """Run one triage case and report the verdict"""
+    try:
+        response = await client.post("/triage", content=case["_body"], headers=JSON_HEADERS)
+        response.raise_for_status()
+        result = response.json()
+        print(f"  ✓ {case['name']}: {result['urgency_level']} (confidence: {result['confidence']:.2f})")
+        return True
+    except Exception as e:
+        print(f"  ✗ {case['name']}: {e}")
+        return False
+
+
+async def test_chat(client, message, body):
+    """Send one chat message"""
+    try:
+        response = await client.post("/chat", content=body, headers=JSON_HEADERS)
+        response.raise_for_status()
+        print(f"  ✓ Chat: {message[:40]} → {response.json()['response'][:60]}...")
+        return True
+    except Exception as e:
+        print(f"  ✗ Chat: {message[:40]}: {e}")
+        return False
+
+
+async def test_history(client):
+    """Fetch triage history"""
+    try:
+        response = await client.get("/history")
+        response.raise_for_status()
+        data = response.json()
+        print(f"  ✓ History: {data['total']} records")
+        return True
+    except Exception as e:
+        print(f"  ✗ History: {e}")
+        return False
+
+
+async def test_metrics(client):
+    """Fetch monitoring metrics"""
+    try:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+        data = response.json()
+        print(f"  ✓ Metrics: {data['total_requests']} requests, avg latency {data['average_latency']}s")
+        return True
+    except Exception as e:
+        print(f"  ✗ Metrics: {e}")
+        return False
+
+
+async def run_all_tests():
+    print("=" * 70)
+    print("MEDICAL TRIAGE ASSISTANT - API TEST SUITE")
+    print("=" * 70)
+
+    # One keep-alive HTTP client; asyncio.gather turns total runtime into
+    # max-of-latencies instead of sum-of-latencies
+    async with httpx.AsyncClient(
+        base_url=API_BASE,
+        timeout=httpx.Timeout(120.0),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    ) as client:
+        print("\nTriage cases:")
+        triage_results = await asyncio.gather(
+            *[test_triage(client, case) for case in TEST_CASES]
+        )
+
+        print("\nChat:")
+        chat_results = await asyncio.gather(
+            *[test_chat(client, message, body) for message, body in CHAT_BODIES]
+        )
+
+        print("\nHistory / Metrics:")
+        other_results = await asyncio.gather(test_history(client), test_metrics(client))
+
+    results = [*triage_results, *chat_results, *other_results]
+    passed, total = sum(results), len(results)
+
+    print("\n" + "=" * 70)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 70)
+    return passed == total
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if asyncio.run(run_all_tests()) else 1)
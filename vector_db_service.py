@@ -125,30 +125,50 @@ class VectorDBService:
         Returns:
             List of (document, similarity_score) tuples
         """
-        if self.index.ntotal == 0:
-            return []
-        
-        # Generate query embedding
-        query_embedding = self.model.encode([query])[0]
-        
-        # Search FAISS index
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries: List[str], k: int = 3) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search several queries in one embedding forward pass
+
+        Transformer embedding is matmul-bound and amortizes heavily with
+        batch size, so n coalesced queries cost one encode() plus one
+        FAISS search over the stacked matrix instead of n model
+        round-trips.
+        """
+        if self.index.ntotal == 0 or not queries:
+            return [[] for _ in queries]
+
+        # One forward pass for the whole batch
+        embeddings = self.model.encode(queries)
+
         distances, indices = self.index.search(
-            np.array([query_embedding], dtype=np.float32), 
+            np.asarray(embeddings, dtype=np.float32),
             min(k, self.index.ntotal)
         )
-        
-        # Return documents with scores
+
+        # Return documents with scores, one row per query
         results = []
-        for idx, dist in zip(indices[0], distances[0]):
-            if idx < len(self.documents):
-                results.append((self.documents[idx], float(dist)))
-        
+        for query_indices, query_distances in zip(indices, distances):
+            row = []
+            for idx, dist in zip(query_indices, query_distances):
+                if idx < len(self.documents):
+                    row.append((self.documents[idx], float(dist)))
+            results.append(row)
+
         return results
-    
+
     def get_relevant_knowledge(self, symptoms: str, k: int = 3) -> List[Dict]:
         """Get relevant medical knowledge for given symptoms"""
         results = self.search(symptoms, k)
         return [doc for doc, score in results]
+
+    def get_relevant_knowledge_batch(self, symptoms: List[str], k: int = 3) -> List[List[Dict]]:
+        """Batched get_relevant_knowledge: one row of documents per query"""
+        return [
+            [doc for doc, score in row]
+            for row in self.search_batch(symptoms, k)
+        ]
     
     def save(self):
         """Save index and documents to disk"""